@@ -1,74 +1,380 @@
-import math
-from datetime import datetime, timedelta, date
+import atexit
+import contextlib
+import copy
+import functools
+import heapq
+import itertools
 import datetime
 import json
 import time
 import random
-from typing import Dict, List, Any, Optional
-from collections import defaultdict
-import pygame
-from pygame import mixer
+import re
+import sys
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Tuple
+from collections import Counter, defaultdict
+from bisect import bisect_left, bisect_right, insort
 import os
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_agg import FigureCanvasAgg
 import io
 import threading
 import logging
+import logging.handlers
+import mmap
+import queue
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 DATA_FILE = "spaced_repetition_data.json"
+# Changes since the last full save are appended here and replayed on load
+WAL_FILE = DATA_FILE + ".wal"
+CHECKPOINT_EVERY = 50
 MAX_TOPICS_PER_DAY = 3
-
-# Set up logging to a file
-logging.basicConfig(filename='srs.log', level=logging.INFO,
-                    format='%(asctime)s - %(levelname)s - %(message)s')
+TOP_TOPICS = 5
+NS_PER_MINUTE = 60_000_000_000
+
+# Longest allowed interval in days, indexed by number of reviews; topics
+# with more reviews than the table covers are capped at MAX_INTERVAL
+_INTERVAL_CAPS = (7, 7, 7, 7, 14, 14, 14, 14)
+MAX_INTERVAL = 60
+
+# SM-2 ease factor bounds
+INITIAL_E_FACTOR = 2.5
+MIN_E_FACTOR = 1.3
+
+_RATING_RE = re.compile(r"\s*([1-5])\s*$")
+
+# Per-topic fields, in the column order used in the data file. Review
+# dates follow as a last "review_date_deltas" column: the first date, then
+# the gap in days to each later one, which is much shorter than repeating
+# full day numbers.
+_TOPIC_FIELDS = (
+    "subject",
+    "next_review",
+    "interval_days",
+    "e_factor",
+    "difficulty",
+    "reviews",
+)
+
+# Bumped whenever _upgrade_data_structure learns a new migration; files
+# already at this version are loaded without walking every topic
+SCHEMA_VERSION = 1
+
+_DEFAULT_STATE: Dict[str, Any] = {
+    "schema_version": SCHEMA_VERSION,
+    "topics": {},
+    "total_reviews": 0,
+    "subjects": {},
+    "streak": {
+        "current": 0,
+        "longest": 0,
+        "last_review": None,
+        "last_homework": None,
+    },
+    "homework": [],
+    "total_homework_completed": 0,
+}
+
+# Set up logging to a file. Records go through a queue to a listener
+# thread, so callers never wait on the log file being written.
+_log_queue: queue.Queue = queue.Queue(-1)
+_log_file_handler = logging.FileHandler('srs.log')
+_log_file_handler.setFormatter(
+    logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+)
+_log_listener = logging.handlers.QueueListener(_log_queue, _log_file_handler)
+logging.getLogger().addHandler(logging.handlers.QueueHandler(_log_queue))
+logging.getLogger().setLevel(logging.INFO)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+# Dates are stored as date.toordinal() day numbers so comparing and
+# subtracting them is plain integer arithmetic; they are only formatted
+# for display.
+@functools.lru_cache(maxsize=4096)
+def ordinal_to_iso(ordinal: Optional[int]) -> Optional[str]:
+    if ordinal is None:
+        return None
+    return datetime.date.fromordinal(ordinal).isoformat()
+
+def _to_ordinal(value: Any) -> Any:
+    # Older data files stored ISO date or datetime strings
+    if isinstance(value, str):
+        return datetime.date.fromisoformat(value[:10]).toordinal()
+    return value
+
+def update_e_factor(e_factor: float, quality: float) -> float:
+    # SM-2: quality is 0-5, anything below 3 counts as a failed recall
+    e_factor += 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02)
+    return e_factor if e_factor > MIN_E_FACTOR else MIN_E_FACTOR
+
+def compute_next_interval(
+    prev_interval: int, e_factor: float, quality: float, num_reviews: int
+) -> int:
+    if quality < 3 or num_reviews <= 1:
+        interval = 1
+    elif num_reviews == 2:
+        interval = 6
+    else:
+        interval = max(1, round(prev_interval * e_factor))
+
+    cap = _INTERVAL_CAPS[num_reviews] if num_reviews < len(_INTERVAL_CAPS) else MAX_INTERVAL
+    return interval if interval < cap else cap
 
 # Class for managing file I/O
 class DataManager:
     @staticmethod
     def load_data() -> Dict[str, Any]:
+        data = DataManager._load_snapshot()
+        DataManager._replay_wal(data)
+        return data
+
+    @staticmethod
+    def _load_snapshot() -> Dict[str, Any]:
         if not os.path.exists(DATA_FILE):
             return DataManager._create_default_data()
 
         try:
-            with open(DATA_FILE, "r") as f:
-                data = json.load(f)
-                DataManager._validate_data_structure(data)
-                return data
-        except (json.JSONDecodeError, FileNotFoundError, PermissionError) as e:
-            logging.error(f"Error loading data file: {e}")
+            data = DataManager._read_json(DATA_FILE)
+            DataManager._unpack_topics(data)
+            DataManager._upgrade_data_structure(data)
+            DataManager._intern_names(data)
+            return data
+        except (
+            json.JSONDecodeError,
+            FileNotFoundError,
+            PermissionError,
+            KeyError,
+            IndexError,
+            TypeError,
+            AttributeError,
+            ValueError,
+        ) as e:
+            # The last five cover files that parse but don't have the
+            # expected layout (e.g. a short topic row or a bad date)
+            logging.error(f"Error loading data file: {e!r}")
             return DataManager._create_default_data()
             
     @staticmethod
-    def save_data(data: Dict[str, Any]) -> None:
+    def save_data(data: Dict[str, Any]) -> bool:
         try:
-            with open(DATA_FILE, "w") as f:
-                json.dump(data, f, indent=2)
+            DataManager.write_file(DATA_FILE, DataManager._pack_topics(data))
             logging.info("Data saved successfully.")
+            return True
         except (IOError, PermissionError) as e:
             logging.error(f"Error saving data file: {e}")
+            return False
+
+    @staticmethod
+    def append_events(events: List[Dict[str, Any]]) -> None:
+        # One JSON document per line, all written with a single write()
+        payload = b"".join(DataManager.dumps(event) + b"\n" for event in events)
+        try:
+            with open(WAL_FILE, "ab") as f:
+                f.write(payload)
+        except (IOError, PermissionError) as e:
+            logging.error(f"Error appending to log file: {e}")
+
+    @staticmethod
+    def has_wal() -> bool:
+        return os.path.exists(WAL_FILE)
+
+    @staticmethod
+    def clear_wal() -> None:
+        try:
+            os.remove(WAL_FILE)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _replay_wal(data: Dict[str, Any]) -> None:
+        if not DataManager.has_wal():
+            return
+        # Each log starts with the id of the snapshot it applies to. A log
+        # whose id doesn't match was already folded into this snapshot by a
+        # checkpoint that died before it could delete the log.
+        applies = True
+        try:
+            with open(WAL_FILE, "rb") as f:
+                for line in f:
+                    try:
+                        event = DataManager.loads(line)
+                    except ValueError:
+                        # A partial last line left by a crash mid-append
+                        logging.warning("Ignoring truncated entry in log file.")
+                        break
+                    try:
+                        if event["op"] == "wal":
+                            applies = event["id"] == data.get("wal_id")
+                            if not applies:
+                                logging.info("Skipping log records already in the data file.")
+                        elif applies:
+                            DataManager._apply_event(data, event)
+                    except (KeyError, IndexError, TypeError) as e:
+                        # Later records may build on this one, so stop here
+                        # just as for a truncated line
+                        logging.warning(f"Ignoring malformed entry in log file: {e!r}")
+                        break
+        except PermissionError as e:
+            logging.error(f"Error reading log file: {e}")
+
+    @staticmethod
+    def _apply_event(data: Dict[str, Any], event: Dict[str, Any]) -> None:
+        # Events carry whole records; applied in order they rebuild the
+        # state as of the last flush
+        op = event["op"]
+        if op == "topic":
+            name, topic_data = sys.intern(event["name"]), event["data"]
+            topic_data["subject"] = sys.intern(topic_data["subject"])
+            if name not in data["topics"]:
+                data["subjects"].setdefault(topic_data["subject"], []).append(name)
+            data["topics"][name] = topic_data
+        elif op == "homework":
+            index = event["id"] - 1
+            if index < len(data["homework"]):
+                data["homework"][index] = event["data"]
+            else:
+                data["homework"].append(event["data"])
+        elif op == "set":
+            data.update(event["values"])
+
+    @staticmethod
+    def write_file(filename: str, data: Dict[str, Any], indent: bool = False) -> None:
+        # Write to a temporary file and swap it in, so a crash mid-write
+        # never leaves a truncated file behind. The fsync makes sure the new
+        # contents are on disk before the rename makes them visible.
+        tmp_filename = filename + ".tmp"
+        with open(tmp_filename, "wb") as f:
+            f.write(DataManager.dumps(data, indent))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_filename, filename)
+
+    @staticmethod
+    def dumps(data: Dict[str, Any], indent: bool = False) -> bytes:
+        # The data file is only read back by the program, so it is written
+        # compactly; pass indent=True for files meant for people to read.
+        if orjson is not None:
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else None)
+        if indent:
+            return json.dumps(data, indent=2).encode("utf-8")
+        return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+    @staticmethod
+    def loads(raw: bytes) -> Any:
+        if orjson is not None:
+            return orjson.loads(raw)
+        return json.loads(raw)
+
+    @staticmethod
+    def _read_json(path: str) -> Any:
+        with open(path, "rb") as f:
+            # orjson can parse straight from a mapping of the file; the json
+            # fallback (and mmap, for empty files) need the bytes read in.
+            if orjson is not None and os.fstat(f.fileno()).st_size:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    with memoryview(mm) as view:
+                        return orjson.loads(view)
+            return DataManager.loads(f.read())
+
+    @staticmethod
+    def _pack_topics(data: Dict[str, Any]) -> Dict[str, Any]:
+        # The data file stores topics as rows under one shared field list
+        # rather than repeating every field name for every topic
+        packed = dict(data)
+        packed["topic_fields"] = (*_TOPIC_FIELDS, "review_date_deltas")
+        rows = []
+        for topic, topic_data in data["topics"].items():
+            row = [topic]
+            row.extend(topic_data[field] for field in _TOPIC_FIELDS)
+            dates = topic_data["review_dates"]
+            row.append([b - a for a, b in zip([0, *dates], dates)])
+            rows.append(row)
+        packed["topics"] = rows
+        return packed
+
+    @staticmethod
+    def _unpack_topics(data: Dict[str, Any]) -> None:
+        # Exports and files from older versions keep the dict-per-topic form
+        if isinstance(data.get("topics"), list):
+            fields = data.pop("topic_fields")
+            missing = set(_TOPIC_FIELDS).difference(fields)
+            if missing:
+                raise ValueError(f"topic_fields is missing {sorted(missing)}")
+            topics = {}
+            for row in data["topics"]:
+                if len(row) != len(fields) + 1:
+                    raise ValueError(f"Topic row has {len(row)} values, expected {len(fields) + 1}")
+                topic_data = dict(zip(fields, row[1:]))
+                if "review_date_deltas" in topic_data:
+                    topic_data["review_dates"] = list(
+                        itertools.accumulate(topic_data.pop("review_date_deltas"))
+                    )
+                topics[row[0]] = topic_data
+            data["topics"] = topics
 
     @staticmethod
     def _create_default_data() -> Dict[str, Any]:
-        return {
-            "topics": {},
-            "total_reviews": 0,
-            "subjects": {},
-            "streak": {
-                "current": 0,
-                "longest": 0,
-                "last_review": None,
-                "last_homework": None,
-            },
-            "homework": {},
-            "total_homework_completed": 0,
-        }
+        return copy.deepcopy(_DEFAULT_STATE)
 
     @staticmethod
-    def _validate_data_structure(data: Dict[str, Any]) -> None:
-        required_keys = ["topics", "total_reviews", "subjects", "streak", "homework", "total_homework_completed"]
-        for key in required_keys:
-            if key not in data:
-                raise ValueError(f"Invalid data structure: missing '{key}' key")
+    def _upgrade_data_structure(data: Dict[str, Any]) -> None:
+        # Read before the defaults below fill in a schema_version
+        current = data.get("schema_version") == SCHEMA_VERSION
+
+        # Files written before homework tracking lack some keys; fill them in
+        # rather than discarding the user's topics.
+        for key, default in _DEFAULT_STATE.items():
+            data.setdefault(key, copy.deepcopy(default))
+        data["streak"].setdefault("last_homework", None)
+
+        # Only the per-topic conversions are costly, so only they are
+        # skipped for files already at the current version
+        if not current:
+            for topic_data in data["topics"].values():
+                topic_data["next_review"] = _to_ordinal(topic_data["next_review"])
+                topic_data["review_dates"] = [
+                    _to_ordinal(d) for d in topic_data.get("review_dates", [])
+                ]
+                # The old schedule kept an unbounded exponential "level"; SM-2
+                # only needs the ease factor and the last interval, which can
+                # be recovered from the last review date.
+                if "level" in topic_data:
+                    del topic_data["level"]
+                    topic_data.setdefault("e_factor", INITIAL_E_FACTOR)
+                    review_dates = topic_data["review_dates"]
+                    topic_data.setdefault(
+                        "interval_days",
+                        max(0, topic_data["next_review"] - review_dates[-1]) if review_dates else 0,
+                    )
+        for key in ("last_review", "last_homework"):
+            data["streak"][key] = _to_ordinal(data["streak"][key])
+
+        # Homework used to be a dict keyed by ID, which JSON turned into
+        # string keys; it is now a list where the ID is the position + 1.
+        if isinstance(data["homework"], dict):
+            data["homework"] = [
+                hw for _, hw in sorted(data["homework"].items(), key=lambda x: int(x[0]))
+            ]
+
+        data["schema_version"] = SCHEMA_VERSION
+
+    @staticmethod
+    def _intern_names(data: Dict[str, Any]) -> None:
+        # Topic and subject names are parsed into a fresh string every place
+        # they appear; interning makes them one shared object so the many
+        # dict lookups on them compare by identity.
+        intern = sys.intern
+        topics = data["topics"]
+        data["topics"] = {intern(topic): topic_data for topic, topic_data in topics.items()}
+        for topic_data in topics.values():
+            topic_data["subject"] = intern(topic_data["subject"])
+        data["subjects"] = {
+            intern(subject): [intern(topic) for topic in subject_topics]
+            for subject, subject_topics in data["subjects"].items()
+        }
 
 class PomodoroTimer:
     def __init__(self, work_duration: int = 25, break_duration: int = 5):
@@ -77,14 +383,18 @@ class PomodoroTimer:
         self.timer_thread: Optional[threading.Thread] = None
         self.is_running = False
         self.is_break = False
+        self._cancel = threading.Event()
+        self._phase_end = 0.0
 
     def start(self) -> None:
         self.is_running = True
+        self._cancel.clear()
         self.timer_thread = threading.Thread(target=self._run_timer)
         self.timer_thread.start()
 
     def stop(self) -> None:
         self.is_running = False
+        self._cancel.set()
         if self.timer_thread:
             self.timer_thread.join()
 
@@ -101,14 +411,13 @@ class PomodoroTimer:
                 self.is_break = not self.is_break
 
     def _countdown(self, duration: int) -> None:
-        start_time = time.time()
-        while time.time() - start_time < duration and self.is_running:
-            remaining = duration - int(time.time() - start_time)
-            mins, secs = divmod(remaining, 60)
-            timer = f"{mins:02d}:{secs:02d}"
-            print(f"\rTime remaining: {timer}", end="", flush=True)
-            time.sleep(1)
-        print()
+        # Sleep until the period ends or stop() wakes us; callers that want
+        # to show progress ask for time_remaining() instead
+        self._phase_end = time.monotonic() + duration
+        self._cancel.wait(timeout=duration)
+
+    def time_remaining(self) -> int:
+        return max(0, int(self._phase_end - time.monotonic()))
 
     def get_state(self) -> str:
         return "break" if self.is_break else "work"
@@ -116,41 +425,216 @@ class PomodoroTimer:
 class SpacedRepetitionSystem:
     def __init__(self):
         self.data: Dict[str, Any] = DataManager.load_data()
-        self.subjects: Dict[str, set] = defaultdict(set)
         self._initialize_subjects()
-        self.homework: Dict[int, Dict[str, Any]] = self.data.get("homework", {})
-        pygame.init()
-        mixer.init()
         self.music_playing = False
-        self.homework: Dict[int, Dict[str, Any]] = self.data.get("homework", {})
+        self._pygame_inited = False
+        self._music_cache: tuple = (0.0, [])
+        self._music_thread: Optional[threading.Thread] = None
+        # Built on the first graph and reused by later ones
+        self._figure = None
+        self._canvas = None
+        self._axes = None
+        self.homework: List[Dict[str, Any]] = self.data["homework"]
+        self._dirty = False
+        self._changed_topics: set = set()
+        self._changed_homework: set = set()
+        self._needs_checkpoint = False
+        self._wal_events = 0
+        if DataManager.has_wal():
+            # Left over from a run that did not exit cleanly
+            self.checkpoint()
+        atexit.register(self.close)
 
     def _initialize_subjects(self) -> None:
-        for topic, data in self.data["topics"].items():
-            self.subjects[data["subject"]].add(topic)
+        # The subject -> topics index is saved with the data; only rebuild it
+        # from the topics when it is missing or out of step with them
+        index = self.data["subjects"]
+        if sum(len(topics) for topics in index.values()) != len(self.data["topics"]):
+            index.clear()
+            for topic, data in self.data["topics"].items():
+                index.setdefault(data["subject"], []).append(topic)
+        self.__dict__.pop("subjects", None)
+        self._build_due_index()
+
+        # Running totals for the progress reports, kept up to date by
+        # review_topic so the reports don't rescan every review
+        self._reviewed_count = sum(
+            1 for topic in self.data["topics"].values() if topic["reviews"] > 0
+        )
+        self._daily_reviews: Counter = Counter(
+            review_date
+            for topic in self.data["topics"].values()
+            for review_date in topic["review_dates"]
+        )
+        # Min-heap of (reviews, topic) for the most reviewed topics
+        self._top_reviewed = [
+            (data["reviews"], topic)
+            for topic, data in heapq.nlargest(
+                TOP_TOPICS, self.data["topics"].items(), key=lambda x: x[1]["reviews"]
+            )
+        ]
+        heapq.heapify(self._top_reviewed)
+
+    def _update_top_reviewed(self, topic: str, reviews: int) -> None:
+        # Review counts only ever grow by one, so a topic outside the heap can
+        # only enter it by overtaking the smallest entry.
+        top = self._top_reviewed
+        for i, (_, t) in enumerate(top):
+            if t == topic:
+                top[i] = (reviews, topic)
+                heapq.heapify(top)
+                return
+        if len(top) < TOP_TOPICS:
+            heapq.heappush(top, (reviews, topic))
+        elif reviews > top[0][0]:
+            heapq.heapreplace(top, (reviews, topic))
+
+    @functools.cached_property
+    def subjects(self) -> Dict[str, set]:
+        # Built from the saved index on first use rather than at startup
+        return defaultdict(
+            set, {s: set(topics) for s, topics in self.data["subjects"].items()}
+        )
 
-    def save_data(self) -> None:
-        DataManager.save_data(self.data)
+    def _build_due_index(self) -> None:
+        # Sorted (next_review, topic) pairs, globally and per subject, so due
+        # topics are a prefix found by bisection rather than a full scan.
+        self._due_index: List[tuple] = sorted(
+            (data["next_review"], topic) for topic, data in self.data["topics"].items()
+        )
+        self._subject_due_index: Dict[str, List[tuple]] = defaultdict(list)
+        for entry in self._due_index:
+            subject = self.data["topics"][entry[1]]["subject"]
+            self._subject_due_index[subject].append(entry)
 
-    def add_topic(self, topic: str, subject: str) -> None:
-        topic = topic.strip()
-        subject = subject.strip()
-        if not topic or not subject:
-            logging.warning("Topic and subject cannot be empty.")
+    def _set_next_review(self, topic: str, next_review: int) -> None:
+        topic_data = self.data["topics"][topic]
+        old_entry = (topic_data["next_review"], topic)
+        for index in (self._due_index, self._subject_due_index[topic_data["subject"]]):
+            del index[bisect_left(index, old_entry)]
+            insort(index, (next_review, topic))
+        topic_data["next_review"] = next_review
+        self._topic_changed(topic)
+
+    def _topic_changed(self, topic: str) -> None:
+        self._changed_topics.add(topic)
+        self._dirty = True
+
+    def _homework_changed(self, homework_id: int) -> None:
+        self._changed_homework.add(homework_id)
+        self._dirty = True
+
+    def save_data(self) -> bool:
+        return DataManager.save_data(self.data)
+
+    def flush(self) -> None:
+        # Mutating methods only record what changed; this appends those
+        # records to the log once per user action instead of rewriting the
+        # whole data file after every change.
+        if not self._dirty:
             return
-        if topic not in self.data["topics"]:
+        if self._needs_checkpoint or self._wal_events >= CHECKPOINT_EVERY:
+            self.checkpoint()
+            return
+
+        events = [
+            {"op": "topic", "name": topic, "data": self.data["topics"][topic]}
+            for topic in self._changed_topics
+        ]
+        if not self._wal_events:
+            events.insert(0, {"op": "wal", "id": self.data.get("wal_id")})
+        events.extend(
+            {"op": "homework", "id": homework_id, "data": self.homework[homework_id - 1]}
+            for homework_id in sorted(self._changed_homework)
+        )
+        events.append(
+            {
+                "op": "set",
+                "values": {
+                    key: self.data[key]
+                    for key in ("total_reviews", "streak", "total_homework_completed")
+                },
+            }
+        )
+        DataManager.append_events(events)
+        self._wal_events += len(events)
+        self._changed_topics.clear()
+        self._changed_homework.clear()
+        self._dirty = False
+
+    @contextlib.contextmanager
+    def batched(self) -> Iterator[None]:
+        # Group everything done inside the block into a single flush, even
+        # if the block raises part way through
+        try:
+            yield
+        finally:
+            self.flush()
+
+    def checkpoint(self) -> None:
+        # Rewrite the full data file and start a fresh log. The snapshot gets
+        # a new log id first, so if we die before the old log is removed its
+        # records are skipped on the next load instead of replayed on top.
+        previous_id = self.data.get("wal_id")
+        self.data["wal_id"] = os.urandom(8).hex()
+        if not self.save_data():
+            self.data["wal_id"] = previous_id
+            return
+        DataManager.clear_wal()
+        self._wal_events = 0
+        self._changed_topics.clear()
+        self._changed_homework.clear()
+        self._needs_checkpoint = False
+        self._dirty = False
+
+    def close(self) -> None:
+        if self._dirty or self._wal_events:
+            self.checkpoint()
+
+    def _today_iso(self) -> str:
+        return ordinal_to_iso(datetime.date.today().toordinal())
+
+    def add_topic(self, topic: str, subject: str) -> None:
+        self.add_topics_bulk([(topic, subject)])
+
+    def add_topics_bulk(self, pairs: Iterable[Tuple[str, str]]) -> None:
+        # New topics are appended to the due indexes and each index is
+        # re-sorted once at the end, instead of an insort per topic.
+        next_review = datetime.date.today().toordinal()
+        touched_subjects = set()
+        added = []
+        for topic, subject in pairs:
+            topic = sys.intern(topic.strip())
+            subject = sys.intern(subject.strip())
+            if not topic or not subject:
+                logging.warning("Topic and subject cannot be empty.")
+                continue
+            if topic in self.data["topics"]:
+                logging.warning(f"Topic '{topic}' already exists.")
+                continue
             self.data["topics"][topic] = {
-                "level": 0,
-                "next_review": datetime.date.today().isoformat(),
+                "e_factor": INITIAL_E_FACTOR,
+                "interval_days": 0,
+                "next_review": next_review,
                 "difficulty": 3,
                 "reviews": 0,
                 "subject": subject,
                 "review_dates": [],
             }
             self.subjects[subject].add(topic)
-            self.save_data()
+            self.data["subjects"].setdefault(subject, []).append(topic)
+            self._subject_due_index[subject].append((next_review, topic))
+            touched_subjects.add(subject)
+            added.append((next_review, topic))
+            self._update_top_reviewed(topic, 0)
+            self._topic_changed(topic)
             logging.info(f"Added topic: {topic} (subject: {subject})")
-        else:
-            logging.warning(f"Topic '{topic}' already exists.")
+
+        if added:
+            self._due_index.extend(added)
+            self._due_index.sort()
+            for subject in touched_subjects:
+                self._subject_due_index[subject].sort()
 
     def review_topic(self, topic: str) -> None:
         topic = topic.strip()
@@ -162,14 +646,7 @@ class SpacedRepetitionSystem:
             return
 
         topic_data = self.data["topics"][topic]
-        current_date = datetime.datetime.now()
-
-        days_since_last_review = (
-            current_date - datetime.datetime.fromisoformat(topic_data["next_review"])
-        ).days
-        early_review_factor = max(
-            0, 1 - (days_since_last_review / 7)
-        )
+        today = datetime.date.today().toordinal()
 
         difficulty = self._get_user_rating(
             "Rate the difficulty (1-5, where 1 is easiest and 5 is hardest): "
@@ -182,26 +659,23 @@ class SpacedRepetitionSystem:
             (6 - difficulty) + confidence
         ) / 2
 
-        topic_data["level"] += review_score / 5
+        topic_data["e_factor"] = update_e_factor(topic_data["e_factor"], review_score)
+        if topic_data["reviews"] == 0:
+            self._reviewed_count += 1
         topic_data["reviews"] += 1
-        topic_data["review_dates"].append(current_date.isoformat())
-
-        base_interval = math.pow(2, topic_data["level"])
-        difficulty_factor = (6 - difficulty) / 3
-        confidence_factor = confidence / 3
-        early_review_bonus = 1 + early_review_factor
-
-        next_interval = int(
-            base_interval * difficulty_factor * confidence_factor * early_review_bonus
-        )
-
-        spaced_interval = self._apply_spaced_repetition_curve(
-            next_interval, topic_data["reviews"]
+        self._update_top_reviewed(topic, topic_data["reviews"])
+        topic_data["review_dates"].append(today)
+        self._daily_reviews[today] += 1
+
+        spaced_interval = compute_next_interval(
+            topic_data["interval_days"],
+            topic_data["e_factor"],
+            review_score,
+            topic_data["reviews"],
         )
+        topic_data["interval_days"] = spaced_interval
 
-        topic_data["next_review"] = (
-            current_date + datetime.timedelta(days=spaced_interval)
-        ).isoformat()
+        self._set_next_review(topic, today + spaced_interval)
 
         topic_data["difficulty"] = self._update_topic_difficulty(
             topic_data["difficulty"], difficulty
@@ -209,32 +683,15 @@ class SpacedRepetitionSystem:
 
         self.data["total_reviews"] += 1
         self.update_streak()
-        self.save_data()
 
         logging.info(f"Reviewed '{topic}'. Next review in {spaced_interval} days.")
 
     def _get_user_rating(self, prompt: str) -> int:
         while True:
-            try:
-                rating = input(prompt).strip()
-                if not rating:
-                    logging.warning("Please enter a number between 1 and 5.")
-                    continue
-                rating = int(rating)
-                if 1 <= rating <= 5:
-                    return rating
-                else:
-                    logging.warning("Please enter a number between 1 and 5.")
-            except ValueError:
-                logging.warning("Please enter a valid number.")
-
-    def _apply_spaced_repetition_curve(self, interval: int, num_reviews: int) -> int:
-        if num_reviews <= 3:
-            return min(interval, 7)
-        elif num_reviews <= 7:
-            return min(interval, 14)
-        else:
-            return min(interval, 60)
+            match = _RATING_RE.match(input(prompt))
+            if match:
+                return int(match.group(1))
+            logging.warning("Please enter a number between 1 and 5.")
 
     def _update_topic_difficulty(
         self, current_difficulty: float, new_difficulty: int
@@ -245,46 +702,25 @@ class SpacedRepetitionSystem:
         )
 
     def get_topics_to_review(self, subject: Optional[str] = None) -> List[str]:
-        today = datetime.date.today().isoformat()
-        if subject:
-            due_topics = {
-                topic
-                for topic in self.subjects.get(subject, set())
-                if self.data["topics"][topic]["next_review"] <= today
-            }
-        else:
-            due_topics = {
-                topic
-                for topic, topic_data in self.data["topics"].items()
-                if topic_data["next_review"] <= today
-            }
-
-        sorted_topics = sorted(
-            due_topics, key=lambda x: self.data["topics"][x]["next_review"]
-        )
+        today = datetime.date.today().toordinal()
+        index = self._subject_due_index.get(subject, []) if subject else self._due_index
+        cut = bisect_right(index, (today + 1,))
+        topics_for_today = [topic for _, topic in index[: min(cut, MAX_TOPICS_PER_DAY)]]
 
-        if len(sorted_topics) > MAX_TOPICS_PER_DAY:
-            topics_for_today = sorted_topics[:MAX_TOPICS_PER_DAY]
-            topics_for_tomorrow = sorted_topics[MAX_TOPICS_PER_DAY:]
+        if cut > MAX_TOPICS_PER_DAY:
+            # Leave the overflow's due dates alone: they stay earlier than
+            # anything reviewed today, so they come first on the next call
+            # instead of tying with fresh 1-day intervals
+            logging.info(f"Deferred {cut - MAX_TOPICS_PER_DAY} topic(s) to a later day.")
 
-            tomorrow = (datetime.date.today() + datetime.timedelta(days=1)).isoformat()
-            for topic in topics_for_tomorrow:
-                self.data["topics"][topic]["next_review"] = tomorrow
-
-            self.save_data()
-            logging.info(f"Rescheduled {len(topics_for_tomorrow)} topic(s) for tomorrow.")
-            return topics_for_today
-        else:
-            return sorted_topics
+        return topics_for_today
 
     def show_progress(self) -> None:
         total_topics = len(self.data["topics"])
         total_reviews = self.data["total_reviews"]
         total_homework = len(self.homework)
         total_homework_completed = self.data.get("total_homework_completed", 0)
-        topics_reviewed = sum(
-            1 for topic in self.data["topics"].values() if topic["reviews"] > 0
-        )
+        topics_reviewed = self._reviewed_count
 
         logging.info(f"\nProgress Report:")
         logging.info(f"Total topics: {total_topics}")
@@ -297,23 +733,18 @@ class SpacedRepetitionSystem:
             f"Homework completion rate: {(total_homework_completed / total_homework * 100) if total_homework else 0:.2f}%"
         )
 
-        logging.info("\nTop 5 most reviewed topics:")
-        sorted_topics = sorted(
-            self.data["topics"].items(), key=lambda x: x[1]["reviews"], reverse=True
-        )[:5]
-        for topic, topic_data in sorted_topics:
+        logging.info(f"\nTop {TOP_TOPICS} most reviewed topics:")
+        for reviews, topic in sorted(self._top_reviewed, key=lambda x: -x[0]):
             logging.info(
-                f"- {topic} ({topic_data['subject']}): {topic_data['reviews']} reviews"
+                f"- {topic} ({self.data['topics'][topic]['subject']}): {reviews} reviews"
             )
 
     def study_session(self) -> None:
-        try:
-            duration = int(
-                input("Enter the duration of the study session in minutes: ")
-            )
-        except ValueError:
+        duration = input("Enter the duration of the study session in minutes: ").strip()
+        if not duration.isdecimal():
             logging.warning("Please enter a valid number of minutes.")
             return
+        duration = int(duration)
 
         subject = input(
             "Enter a subject to focus on (or press Enter for all subjects): "
@@ -333,33 +764,50 @@ class SpacedRepetitionSystem:
         pomodoro = PomodoroTimer()
         pomodoro.start()
 
-        end_time = time.time() + duration * 60
+        # Bind the names used on every pass of the loop to locals
+        review = self.review_topic
+        topics = self.data["topics"]
+        now = time.monotonic_ns
+
+        # Monotonic so clock adjustments can't stretch or cut the session
+        current_time = now()
+        end_time = current_time + duration * NS_PER_MINUTE
         topics_reviewed = 0
+        # Fetched once: the overflow is left due rather than moved to
+        # tomorrow, so asking again would go past the daily limit
+        due_topics = self.get_topics_to_review(subject)
 
-        while time.time() < end_time:
+        while current_time < end_time:
             if pomodoro.get_state() == "work":
-                due_topics = self.get_topics_to_review(subject)
                 if not due_topics:
                     logging.info("No more topics to review. Session ended early.")
                     break
 
-                topic = random.choice(due_topics)
-                logging.info(f"\nTime remaining: {int((end_time - time.time()) / 60)} minutes")
+                # Swap a random entry to the end and pop it, so the pick is
+                # O(1) and a topic is never offered twice from one list
+                i = random.randrange(len(due_topics))
+                due_topics[i], due_topics[-1] = due_topics[-1], due_topics[i]
+                topic = due_topics.pop()
+                logging.info(f"\nTime remaining: {(end_time - current_time) // NS_PER_MINUTE} minutes")
+                mins, secs = divmod(pomodoro.time_remaining(), 60)
+                logging.info(f"Pomodoro {pomodoro.get_state()} period: {mins:02d}:{secs:02d} left")
                 logging.info(
-                    f"Review topic: {topic} (subject: {self.data['topics'][topic]['subject']})"
+                    f"Review topic: {topic} (subject: {topics[topic]['subject']})"
                 )
                 input("Press Enter when you're ready to rate the difficulty...")
-                self.review_topic(topic)
+                review(topic)
                 topics_reviewed += 1
             else:
                 logging.info("It's break time! Take a moment to relax.")
                 time.sleep(10)
 
-            if time.time() >= end_time:
+            current_time = now()
+            if current_time >= end_time:
                 logging.info("\nStudy session time is up!")
                 break
 
         pomodoro.stop()
+        self.flush()
 
         if self.music_playing:
             self.toggle_music()
@@ -369,25 +817,69 @@ class SpacedRepetitionSystem:
         )
 
     def toggle_music(self) -> None:
+        # pygame is slow to import and initialize, so only pay for it once
+        # music is actually used
+        import pygame
+        from pygame import mixer
+
+        # Let a load still in progress finish first, so music_playing reflects
+        # whether it actually started and a stop can't be overtaken by it
+        if self._music_thread is not None:
+            self._music_thread.join()
+            self._music_thread = None
+
         if self.music_playing:
             mixer.music.stop()
             self.music_playing = False
             logging.info("Music stopped")
         else:
+            if not self._pygame_inited:
+                pygame.init()
+                mixer.init()
+                self._pygame_inited = True
             music_dir = "music"
             if not os.path.exists(music_dir):
                 logging.info("Music directory does not exist. Creating...")
                 os.mkdir(music_dir)
-            music_files = [f for f in os.listdir(music_dir) if f.endswith(".mp3")]
+            # Only rescan the directory when its contents have changed
+            mtime = os.stat(music_dir).st_mtime
+            if mtime != self._music_cache[0]:
+                # scandir's directory entries already know whether they
+                # are files, so filtering needs no extra stat calls
+                with os.scandir(music_dir) as entries:
+                    self._music_cache = (
+                        mtime,
+                        [
+                            entry.name
+                            for entry in entries
+                            if entry.name.endswith(".mp3") and entry.is_file()
+                        ],
+                    )
+            music_files = self._music_cache[1]
             if music_files:
                 music_file = os.path.join(music_dir, random.choice(music_files))
-                mixer.music.load(music_file)
-                mixer.music.play(-1)
+                # Decoding a large MP3 can take a noticeable moment, so load
+                # and start it in the background and return to the menu. The
+                # flag is set up front so callers that stop music on the way
+                # out still do; the thread clears it if playback fails.
                 self.music_playing = True
-                logging.info("Music started.")
+                self._music_thread = threading.Thread(
+                    target=self._load_and_play, args=(mixer, music_file), daemon=True
+                )
+                self._music_thread.start()
             else:
                 logging.warning("No music files available.")
 
+    def _load_and_play(self, mixer: Any, music_file: str) -> None:
+        try:
+            mixer.music.load(music_file)
+            mixer.music.play(-1)
+        except Exception as e:
+            self.music_playing = False
+            logging.error(f"Error playing {music_file}: {e}")
+        else:
+            logging.info("Music started.")
+
     def show_subjects(self) -> None:
         logging.info("\nSubjects:")
         for subject, topics in self.subjects.items():
@@ -396,18 +888,33 @@ class SpacedRepetitionSystem:
     def export_data(self) -> None:
             filename = input("Enter the filename to export data (e.g., 'export.json'): ")
             try:
+                # Exports are for people to read, so dates go out as ISO
+                # strings. No schema_version is written, which makes an
+                # import convert them back like any older file.
+                topics = {
+                    topic: {
+                        **topic_data,
+                        "next_review": ordinal_to_iso(topic_data["next_review"]),
+                        "review_dates": [ordinal_to_iso(d) for d in topic_data["review_dates"]],
+                    }
+                    for topic, topic_data in self.data["topics"].items()
+                }
+                streak = self.data["streak"]
                 export_data = {
-                    "topics": self.data["topics"],
+                    "topics": topics,
                     "total_reviews": self.data["total_reviews"],
                     "subjects": self.data["subjects"],
-                    "streak": self.data["streak"],
+                    "streak": {
+                        **streak,
+                        "last_review": ordinal_to_iso(streak["last_review"]),
+                        "last_homework": ordinal_to_iso(streak["last_homework"]),
+                    },
                     "homework": self.homework,
                     "total_homework_completed": self.data.get(
                         "total_homework_completed", 0
                     ),
                 }
-                with open(filename, "w") as f:
-                    json.dump(export_data, f, indent=2)
+                DataManager.write_file(filename, export_data, indent=True)
                 logging.info(f"Data exported successfully to {filename}")
             except IOError as e:
                 logging.error(f"Error occurred while exporting data: {e}")
@@ -415,41 +922,55 @@ class SpacedRepetitionSystem:
     def import_data(self) -> None:
         filename = input("Enter the filename to import data from: ")
         try:
-            with open(filename, "r") as f:
-                imported_data = json.load(f)
+            with open(filename, "rb") as f:
+                imported_data = DataManager.loads(f.read())
+            DataManager._unpack_topics(imported_data)
             if not all(
                 key in imported_data for key in ["topics", "total_reviews", "subjects"]
             ):
                 logging.error("Invalid data format in the import file.")
                 return
-            self.data = imported_data
-            self._initialize_subjects()
-            self.homework = self.data.get("homework", {})
-            self.save_data()
+            DataManager._upgrade_data_structure(imported_data)
+            # Check the topics before replacing anything, so a bad file
+            # leaves the current data untouched
+            topic_keys = (*_TOPIC_FIELDS, "review_dates")
+            if not all(
+                all(key in topic_data for key in topic_keys)
+                for topic_data in imported_data["topics"].values()
+            ):
+                logging.error("Invalid data format in the import file.")
+                return
+            DataManager._intern_names(imported_data)
+            old_data, self.data = self.data, imported_data
+            try:
+                self._initialize_subjects()
+            except Exception:
+                # Values of the wrong type (e.g. a string review count) only
+                # fail while the indexes are built; put the old data back
+                self.data = old_data
+                self._initialize_subjects()
+                raise
+            self.homework = self.data["homework"]
+            self._needs_checkpoint = True
+            self._dirty = True
             logging.info(f"Data imported successfully from {filename}")
         except (IOError, json.JSONDecodeError) as e:
             logging.error(f"Error occurred while importing data: {e}")
+        except (KeyError, IndexError, TypeError, AttributeError, ValueError) as e:
+            logging.error(f"Invalid data format in the import file: {e!r}")
 
     def show_weekly_progress(self) -> None:
-        today = datetime.date.today()
-        week_ago = today - datetime.timedelta(days=7)
-        daily_reviews = {
-            (today - datetime.timedelta(days=i)).isoformat(): 0 for i in range(7)
-        }
-
-        for topic in self.data["topics"].values():
-            for review_date in topic.get("review_dates", []):
-                if review_date in daily_reviews:
-                    daily_reviews[review_date] += 1
+        today = datetime.date.today().toordinal()
 
         logging.info("\nWeekly Progress (Reviews per day):")
-        for date, count in daily_reviews.items():
+        for day in range(today - 6, today + 1):
+            count = self._daily_reviews[day]
             bar = "#" * count
-            logging.info(f"{date}: {bar} ({count})")
+            logging.info(f"{ordinal_to_iso(day)}: {bar} ({count})")
 
     def update_streak(self, homework: bool = False) -> None:
-        today = datetime.date.today().isoformat()
-        yesterday = (datetime.date.today() - datetime.timedelta(days=1)).isoformat()
+        today = datetime.date.today().toordinal()
+        yesterday = today - 1
 
         if self.data["streak"]["last_review"] == yesterday or (
             homework and self.data["streak"]["last_homework"] == yesterday
@@ -467,14 +988,14 @@ class SpacedRepetitionSystem:
             self.data["streak"]["last_homework"] = today
         else:
             self.data["streak"]["last_review"] = today
-        self.save_data()
+        self._dirty = True
 
     def show_streak(self) -> None:
         logging.info(f"\nCurrent streak: {self.data['streak']['current']} days")
         logging.info(f"Longest streak: {self.data['streak']['longest']} days")
-        logging.info(f"Last review: {self.data['streak']['last_review']}")
+        logging.info(f"Last review: {ordinal_to_iso(self.data['streak']['last_review'])}")
         logging.info(
-            f"Last homework completion: {self.data['streak'].get('last_homework', 'Never')}"
+            f"Last homework completion: {ordinal_to_iso(self.data['streak'].get('last_homework')) or 'Never'}"
         )
 
     def show_topic_history(self) -> None:
@@ -483,15 +1004,16 @@ class SpacedRepetitionSystem:
             topic_data = self.data["topics"][topic]
             logging.info(f"\nReview history for '{topic}':")
             logging.info(f"Subject: {topic_data['subject']}")
-            logging.info(f"Current level: {topic_data['level']}")
+            logging.info(f"Ease factor: {topic_data['e_factor']:.2f}")
+            logging.info(f"Current interval: {topic_data['interval_days']} days")
             logging.info(f"Total reviews: {topic_data['reviews']}")
             logging.info(f"Current difficulty: {topic_data['difficulty']}")
-            logging.info(f"Next review: {topic_data['next_review']}")
+            logging.info(f"Next review: {ordinal_to_iso(topic_data['next_review'])}")
 
             if "review_dates" in topic_data:
                 logging.info("\nPast reviews:")
                 for date in topic_data["review_dates"]:
-                    logging.info(f"- {date}")
+                    logging.info(f"- {ordinal_to_iso(date)}")
             else:
                 logging.info("\nNo past review data available.")
         else:
@@ -509,29 +1031,34 @@ class SpacedRepetitionSystem:
         except ValueError:
             logging.warning("Invalid date format. Please use YYYY-MM-DD.")
             return
-        homework_id = len(self.homework) + 1
-        self.homework[homework_id] = {
-            "subject": subject,
-            "description": description,
-            "due_date": due_date,
-            "completed": False,
-        }
-        logging.info(f"Homework added with ID: {homework_id}")
-        self.data["homework"] = self.homework
-        self.save_data()
+        self.homework.append(
+            {
+                "subject": subject,
+                "description": description,
+                "due_date": due_date,
+                "completed": False,
+            }
+        )
+        logging.info(f"Homework added with ID: {len(self.homework)}")
+        self._homework_changed(len(self.homework))
+
+    def _get_homework(self, homework_id: int) -> Optional[Dict[str, Any]]:
+        if 1 <= homework_id <= len(self.homework):
+            return self.homework[homework_id - 1]
+        return None
 
     def complete_homework(self, homework_id: int) -> None:
-        if homework_id in self.homework:
-            if not self.homework[homework_id]["completed"]:
-                self.homework[homework_id]["completed"] = True
-                self.homework[homework_id]["completion_date"] = datetime.date.today().isoformat()
+        homework = self._get_homework(homework_id)
+        if homework is not None:
+            if not homework["completed"]:
+                homework["completed"] = True
+                homework["completion_date"] = self._today_iso()
                 self.data["total_homework_completed"] = (
                     self.data.get("total_homework_completed", 0) + 1
                 )
                 self.update_streak(homework=True)
                 logging.info(f"Homework (ID: {homework_id}) marked as completed.")
-                self.data["homework"] = self.homework
-                self.save_data()
+                self._homework_changed(homework_id)
             else:
                 logging.info(f"Homework (ID: {homework_id}) was already completed.")
         else:
@@ -543,15 +1070,15 @@ class SpacedRepetitionSystem:
             return
 
         logging.info("\nCurrent Homework:")
-        for id, hw in self.homework.items():
+        for id, hw in enumerate(self.homework, 1):
             status = "Completed" if hw["completed"] else "Pending"
             logging.info(
                 f"ID: {id}, Subject: {hw['subject']}, Description: {hw['description']}, Due: {hw['due_date']}, Status: {status}"
             )
 
     def edit_homework(self, homework_id: int) -> None:
-        if homework_id in self.homework:
-            homework = self.homework[homework_id]
+        homework = self._get_homework(homework_id)
+        if homework is not None:
             logging.info(f"\nCurrent homework details:")
             logging.info(f"Subject: {homework['subject']}")
             logging.info(f"Description: {homework['description']}")
@@ -587,8 +1114,7 @@ class SpacedRepetitionSystem:
                 homework["completed"] = new_completed == "y"
 
             logging.info("Homework updated successfully.")
-            self.data["homework"] = self.homework
-            self.save_data()
+            self._homework_changed(homework_id)
         else:
             logging.warning(f"Homework with ID {homework_id} not found.")
 
@@ -596,16 +1122,27 @@ class SpacedRepetitionSystem:
         topics = list(self.data["topics"].keys())
         reviews = [topic_data["reviews"] for topic_data in self.data["topics"].values()]
 
-        plt.figure(figsize=(10, 6))
-        plt.bar(topics, reviews)
-        plt.title("Topic Review Frequency")
-        plt.xlabel("Topics")
-        plt.ylabel("Number of Reviews")
-        plt.xticks(rotation=90)
-        plt.tight_layout()
+        # matplotlib is slow to import, so only load it when a graph is made
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        # Build the figure once and redraw it on later calls; pyplot would
+        # create and tear down a whole new figure every time
+        if self._figure is None:
+            self._figure = Figure(figsize=(10, 6))
+            self._canvas = FigureCanvasAgg(self._figure)
+            self._axes = self._figure.add_subplot()
+
+        ax = self._axes
+        ax.clear()
+        ax.bar(topics, reviews)
+        ax.set_title("Topic Review Frequency")
+        ax.set_xlabel("Topics")
+        ax.set_ylabel("Number of Reviews")
+        ax.tick_params(axis="x", labelrotation=90)
+        self._figure.tight_layout()
 
         buf = io.BytesIO()
-        plt.savefig(buf, format="png")
+        self._canvas.print_png(buf)
         buf.seek(0)
-        plt.close()  # Close the figure to free up memory
         return buf
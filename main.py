@@ -1,11 +1,7 @@
 import logging
-from classes import SpacedRepetitionSystem
-
-# Set up logging
-logging.basicConfig(filename='srs.log', level=logging.INFO,
-                    format='%(asctime)s - %(levelname)s - %(message)s')
-
-
+import sys
+from typing import Callable, Dict, Optional
+from classes import SpacedRepetitionSystem, ordinal_to_iso
 
 INITIAL_TOPICS = [
     ("Road Not Taken", "Literature"),
@@ -37,11 +33,132 @@ INITIAL_TOPICS = [
     ("The French Revolution", "History"),
 ]
 
+MENU_STR = """
+1. Add a new topic
+2. Review a topic
+3. Show topics to review today
+4. Show all topics
+5. Show progress
+6. Start a study session
+7. Show subjects
+8. Export data (JSON)
+9. Import data (JSON)
+10. Show weekly progress
+11. Show streak
+12. Show topic history
+13. Toggle music
+14. Add homework
+15. Complete homework
+16. Show homework
+17. Edit homework
+18. Create graph
+19. Exit"""
+
 def initialize_topics(srs: SpacedRepetitionSystem) -> None:
-    for topic, subject in INITIAL_TOPICS:
-        srs.add_topic(topic.lower(), subject.lower())
+    # Drop repeats and topics that already exist up front instead of letting
+    # add_topic warn about each one
+    existing = srs.data["topics"].keys()
+    new_topics = dict.fromkeys(
+        (topic.lower(), subject.lower()) for topic, subject in INITIAL_TOPICS
+    )
+    with srs.batched():
+        srs.add_topics_bulk(
+            (topic, subject) for topic, subject in new_topics if topic not in existing
+        )
     logging.info("Initial topics have been added.")
 
+def _add_topic(srs: SpacedRepetitionSystem) -> None:
+    topic = input("Enter the topic name: ")
+    subject = input("Enter the subject: ")
+    srs.add_topic(topic, subject)
+
+def _review_topic(srs: SpacedRepetitionSystem) -> None:
+    topic = input("Enter the topic to review: ")
+    srs.review_topic(topic)
+
+def _show_topics_to_review(srs: SpacedRepetitionSystem) -> None:
+    subject = input(
+        "Enter a subject (or press Enter for all subjects): "
+    ).strip()
+    topics_to_review = srs.get_topics_to_review(subject if subject else None)
+    if topics_to_review:
+        topics = srs.data["topics"]
+        sys.stdout.write("Topics to review today:\n" + "".join(
+            f"- {topic} (subject: {topics[topic]['subject']})\n"
+            for topic in topics_to_review
+        ))
+    else:
+        print("No topics to review today.")
+
+def _show_all_topics(srs: SpacedRepetitionSystem) -> None:
+    if srs.data["topics"]:
+        # One write for the whole listing rather than one per topic
+        sys.stdout.write("All topics:\n" + "".join(
+            f"- {topic} (subject: {topic_data['subject']}, Next review: {ordinal_to_iso(topic_data['next_review'])}, Difficulty: {topic_data['difficulty']}, Reviews: {topic_data['reviews']})\n"
+            for topic, topic_data in srs.data["topics"].items()
+        ))
+    else:
+        print("No topics added yet.")
+
+def _add_homework(srs: SpacedRepetitionSystem) -> None:
+    subject = input("Enter the subject for the homework: ")
+    description = input("Enter the homework description: ")
+    due_date = input("Enter the due date (YYYY-MM-DD): ")
+    srs.add_homework(subject, description, due_date)
+
+def _complete_homework(srs: SpacedRepetitionSystem) -> None:
+    homework_id = input("Enter the homework ID to mark as completed: ").strip()
+    if homework_id.isdecimal():
+        srs.complete_homework(int(homework_id))
+    else:
+        print("Please enter a valid homework ID.")
+
+def _edit_homework(srs: SpacedRepetitionSystem) -> None:
+    homework_id = input("Enter the homework ID to edit: ").strip()
+    if homework_id.isdecimal():
+        srs.edit_homework(int(homework_id))
+    else:
+        print("Please enter a valid homework ID.")
+
+def _create_graph(srs: SpacedRepetitionSystem) -> None:
+    graph_buffer = srs.generate_progress_graph()
+    with open("progress_graph.png", "wb") as f:
+        f.write(graph_buffer.getbuffer())
+    print("Progress graph saved as 'progress_graph.png'")
+
+def _exit(srs: SpacedRepetitionSystem) -> bool:
+    if srs.music_playing:
+        srs.toggle_music()
+    srs.close()
+    print("Exiting program. Bye!")
+    return True
+
+def _invalid_choice(srs: SpacedRepetitionSystem) -> None:
+    print("Invalid choice. Please enter a number between 1 and 19.")
+
+# Menu choice -> handler; a handler returns True to leave the menu loop
+HANDLERS: Dict[str, Callable[[SpacedRepetitionSystem], Optional[bool]]] = {
+    "1": _add_topic,
+    "2": _review_topic,
+    "3": _show_topics_to_review,
+    "4": _show_all_topics,
+    "5": SpacedRepetitionSystem.show_progress,
+    "6": SpacedRepetitionSystem.study_session,
+    "7": SpacedRepetitionSystem.show_subjects,
+    "8": SpacedRepetitionSystem.export_data,
+    "9": SpacedRepetitionSystem.import_data,
+    "10": SpacedRepetitionSystem.show_weekly_progress,
+    "11": SpacedRepetitionSystem.show_streak,
+    "12": SpacedRepetitionSystem.show_topic_history,
+    "13": SpacedRepetitionSystem.toggle_music,
+    "14": _add_homework,
+    "15": _complete_homework,
+    "16": SpacedRepetitionSystem.show_homework,
+    "17": _edit_homework,
+    "18": _create_graph,
+    "19": _exit,
+}
+
 def main() -> None:
     srs = SpacedRepetitionSystem()
     if not srs.data["topics"]:
@@ -49,99 +166,12 @@ def main() -> None:
 
     while True:
         try:
-            print("\n1. Add a new topic")
-            print("2. Review a topic")
-            print("3. Show topics to review today")
-            print("4. Show all topics")
-            print("5. Show progress")
-            print("6. Start a study session")
-            print("7. Show subjects")
-            print("8. Export data (JSON)")
-            print("9. Import data (JSON)")
-            print("10. Show weekly progress")
-            print("11. Show streak")
-            print("12. Show topic history")
-            print("13. Toggle music")
-            print("14. Add homework")
-            print("15. Complete homework")
-            print("16. Show homework")
-            print("17. Edit homework")
-            print("18. Create graph")
-            print("19. Exit")
+            print(MENU_STR)
             choice = input("Enter your choice (1-19): ")
 
-            if choice == "1":
-                topic = input("Enter the topic name: ")
-                subject = input("Enter the subject: ")
-                srs.add_topic(topic, subject)
-            elif choice == "2":
-                topic = input("Enter the topic to review: ")
-                srs.review_topic(topic)
-            elif choice == "3":
-                subject = input(
-                    "Enter a subject (or press Enter for all subjects): "
-                ).strip()
-                topics_to_review = srs.get_topics_to_review(subject if subject else None)
-                if topics_to_review:
-                    print("Topics to review today:")
-                    for topic in topics_to_review:
-                        print(
-                            f"- {topic} (subject: {srs.data['topics'][topic]['subject']})"
-                        )
-                else:
-                    print("No topics to review today.")
-            elif choice == "4":
-                if srs.data["topics"]:
-                    print("All topics:")
-                    for topic, topic_data in srs.data["topics"].items():
-                        print(
-                            f"- {topic} (subject: {topic_data['subject']}, Next review: {topic_data['next_review']}, Difficulty: {topic_data['difficulty']}, Reviews: {topic_data['reviews']})"
-                        )
-                else:
-                    print("No topics added yet.")
-            elif choice == "5":
-                srs.show_progress()
-            elif choice == "6":
-                srs.study_session()
-            elif choice == "7":
-                srs.show_subjects()
-            elif choice == "8":
-                srs.export_data()
-            elif choice == "9":
-                srs.import_data()
-            elif choice == "10":
-                srs.show_weekly_progress()
-            elif choice == "11":
-                srs.show_streak()
-            elif choice == "12":
-                srs.show_topic_history()
-            elif choice == "13":
-                srs.toggle_music()
-            elif choice == "14":
-                subject = input("Enter the subject for the homework: ")
-                description = input("Enter the homework description: ")
-                due_date = input("Enter the due date (YYYY-MM-DD): ")
-                srs.add_homework(subject, description, due_date)
-            elif choice == "15":
-                homework_id = int(input("Enter the homework ID to mark as completed: "))
-                srs.complete_homework(homework_id)
-            elif choice == "16":
-                srs.show_homework()
-            elif choice == "17":
-                homework_id = int(input("Enter the homework ID to edit: "))
-                srs.edit_homework(homework_id)
-            elif choice == "18":
-                graph_buffer = srs.generate_progress_graph()
-                with open("progress_graph.png", "wb") as f:
-                    f.write(graph_buffer.getbuffer())
-                print("Progress graph saved as 'progress_graph.png'")
-            elif choice == "19":
-                if srs.music_playing:
-                    srs.toggle_music()
-                print("Exiting program. Bye!")
-                break
-            else:
-                print("Invalid choice. Please enter a number between 1 and 19.")
+            with srs.batched():
+                if HANDLERS.get(choice, _invalid_choice)(srs):
+                    break
         except Exception as e:
             logging.error(f"An unexpected error occurred: {e}")
             print("An error occurred. Please try again.")